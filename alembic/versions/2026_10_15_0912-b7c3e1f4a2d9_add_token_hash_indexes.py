@@ -0,0 +1,36 @@
+"""Add token hash indexes
+
+Revision ID: b7c3e1f4a2d9
+Revises: 6f591aae8b56
+Create Date: 2026-10-15 09:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c3e1f4a2d9'
+down_revision: Union[str, Sequence[str], None] = '6f591aae8b56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_users_access_token_hash', 'users', ['access_token_hash'], unique=False,
+        postgresql_where=sa.text('access_token_hash IS NOT NULL')
+    )
+    op.create_index(
+        'ix_users_refresh_token_hash', 'users', ['refresh_token_hash'], unique=False,
+        postgresql_where=sa.text('refresh_token_hash IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_refresh_token_hash', table_name='users')
+    op.drop_index('ix_users_access_token_hash', table_name='users')
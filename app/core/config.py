@@ -1,5 +1,7 @@
-from pydantic_settings import BaseSettings
-from typing import Optional, List
+from functools import lru_cache
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode
+from typing import Annotated, Optional, List
 import json
 
 class Settings(BaseSettings):
@@ -14,61 +16,29 @@ class Settings(BaseSettings):
     REDIS_URL: str
     DEBUG: bool
     ENVIRONMENT: str
-    CORS_ORIGINS: List[str]
+    CORS_ORIGINS: Annotated[List[str], NoDecode]
+    THREADPOOL_MAX_WORKERS: int = 64
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_RECYCLE: int = 1800
     
+    @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
-    def load_from_env(cls):
-        return cls()
+    def parse_cors_origins(cls, value):
+        """Accept a JSON list or a comma-separated string"""
+        if isinstance(value, str):
+            value = value.strip()
+            if value.startswith("["):
+                return json.loads(value)
+            return [origin.strip() for origin in value.split(",") if origin.strip()]
+        return value
     
-    @property
-    def database_url(self):
-        return self.DATABASE_URL
-    
-    @property
-    def openai_api_key(self):
-        return self.OPENAI_API_KEY
-    
-    @property
-    def anthropic_api_key(self):
-        return self.ANTHROPIC_API_KEY
-    
-    @property
-    def gemini_api_key(self):
-        return self.GEMINI_API_KEY
-    
-    @property
-    def jwt_secret(self):
-        return self.JWT_SECRET
-    
-    @property
-    def jwt_algorithm(self):
-        return self.JWT_ALGORITHM
-    
-    @property
-    def jwt_expire_minutes(self):
-        return self.JWT_EXPIRE_MINUTES
-    
-    @property
-    def redis_url(self):
-        return self.REDIS_URL
-    
-    @property
-    def debug(self):
-        return self.DEBUG
-    
-    @property
-    def CORS_ORIGINS_LIST(self) -> List[str]:
-        """Convert CORS_ORIGINS string to list"""
-        try:
-            return json.loads(self.CORS_ORIGINS)
-        except json.JSONDecodeError:
-            return ["https://localhost:3000", "https://localhost:5173"]
-    
-    @property
-    def environment(self):
-        return self.ENVIRONMENT
-
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings once per process; usable as a FastAPI dependency"""
+    return Settings()
+
+settings = get_settings()
\ No newline at end of file
@@ -1,16 +1,31 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy_utils import database_exists, create_database
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from app.core.config import settings
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# SQLite uses SingletonThreadPool/StaticPool, which reject QueuePool sizing options
+pool_options = {}
+if make_url(settings.DATABASE_URL).get_backend_name() != "sqlite":
+    pool_options = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_use_lifo=True,
+    )
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    query_cache_size=1200,
+    **pool_options
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+class Base(DeclarativeBase):
+    pass
 
 def get_db():
     db = SessionLocal()
@@ -33,7 +48,13 @@ def create_database_if_not_exists():
     """
     Check if the database exists, if not create it.
     This function handles database creation for different database types.
+    Only runs in development; other environments rely on Alembic migrations.
     """
+    if settings.ENVIRONMENT != "development":
+        return True
+
+    from sqlalchemy_utils import database_exists, create_database
+
     try:
         if not database_exists(engine.url):
             logger.info(f"Database does not exist. Creating database: {engine.url}")
@@ -0,0 +1,18 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.user import User
+from app.services.auth_service import AuthService
+
+bearer = HTTPBearer(auto_error=True)
+
+def current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db)) -> User:
+    """Resolve the bearer token to its user, or reject the request"""
+    user = AuthService(db).get_current_user(credentials.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid access token"
+        )
+    return user
@@ -0,0 +1,4 @@
+from argon2 import PasswordHasher
+
+# Shared by everything that hashes or verifies passwords (argon2id, OWASP parameters)
+password_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1, hash_len=32)
@@ -1,26 +1,38 @@
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.routes import router
+from app.core.config import settings
 from app.core.database import init_database
+from app.services.smart_model_selector import close_http_client
+from app.schemas.common import MessageResponse
 
-init_database()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Password hashing runs in the threadpool, so size it for concurrent logins
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_MAX_WORKERS
+    await to_thread.run_sync(init_database)
+    yield
+    await close_http_client()
 
 app = FastAPI(
     title="E Commerece API",
     description="A FastAPI application with JWT authentication for E Commerce API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 app.include_router(router, prefix="/api/v1")
 
-@app.get("/")
+@app.get("/", response_model=MessageResponse)
 async def root():
     return {"message": "Welcome to Midora.ai API"} 
\ No newline at end of file
@@ -1,31 +1,46 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, DateTime, Index, text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column
 from app.core.database import Base
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    username = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    is_active = Column(Boolean, default=True)
-    is_verified = Column(Boolean, default=False)
-    access_token_hash = Column(String, nullable=True)
-    refresh_token_hash = Column(String, nullable=True)
-    access_token_expires_at = Column(DateTime, nullable=True)
-    refresh_token_expires_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    email: Mapped[str] = mapped_column(String, unique=True, index=True)
+    username: Mapped[str] = mapped_column(String, unique=True, index=True)
+    hashed_password: Mapped[str] = mapped_column(String)
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)
+    is_verified: Mapped[Optional[bool]] = mapped_column(default=False)
+    access_token_hash: Mapped[Optional[str]] = mapped_column(String)
+    refresh_token_hash: Mapped[Optional[str]] = mapped_column(String)
+    access_token_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    refresh_token_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_users_access_token_hash",
+            "access_token_hash",
+            postgresql_where=text("access_token_hash IS NOT NULL")
+        ),
+        Index(
+            "ix_users_refresh_token_hash",
+            "refresh_token_hash",
+            postgresql_where=text("refresh_token_hash IS NOT NULL")
+        ),
+    )
 
     def __repr__(self):
-        return f"<User(id={self.id}, email={self.email}, name={self.name})>"
+        return f"<User(id={self.id}, email={self.email}, username={self.username})>"
 
     def to_dict(self):
         return {
             "id": self.id,
             "email": self.email,
-            "name": self.name,
+            "username": self.username,
             "created_at": self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
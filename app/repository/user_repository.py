@@ -1,35 +1,80 @@
+from sqlalchemy import bindparam, or_, select, update
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
-from passlib.context import CryptContext
+from app.core.security import password_hasher
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from typing import Optional
 from datetime import datetime
+import bcrypt
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Built once with bound parameters so every call hits the compiled statement cache
+_select_by_email = select(User).where(User.email == bindparam("email"))
+_select_by_username = select(User).where(User.username == bindparam("username"))
+_select_by_email_or_username = select(User).where(
+    or_(User.email == bindparam("email"), User.username == bindparam("username"))
+).limit(1)
+_select_by_refresh_token = select(User).where(
+    User.refresh_token_hash == bindparam("token_hash"),
+    User.refresh_token_expires_at > bindparam("now")
+)
+_select_by_access_token = select(User).where(
+    User.access_token_hash == bindparam("token_hash"),
+    User.access_token_expires_at > bindparam("now")
+)
 
 class UserRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, hasher: Optional[PasswordHasher] = None):
         self.db = db
+        self.hasher = hasher or password_hasher
 
     def get_password_hash(self, password: str) -> str:
-        """Hash a password using bcrypt"""
-        return pwd_context.hash(password)
+        """Hash a password using argon2id"""
+        return self.hasher.hash(password)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        if hashed_password.startswith("$2"):
+            # Legacy bcrypt hash, upgraded on the next successful login
+            try:
+                return bcrypt.checkpw(plain_password.encode()[:72], hashed_password.encode())
+            except ValueError:
+                return False
+        try:
+            return self.hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def password_needs_rehash(self, hashed_password: str) -> bool:
+        """Check if a stored hash should be upgraded to the current argon2 parameters"""
+        if hashed_password.startswith("$2"):
+            return True
+        return self.hasher.check_needs_rehash(hashed_password)
+
+    def update_password_hash(self, user: User, password: str) -> None:
+        """Re-hash and store a user's password"""
+        user.hashed_password = self.get_password_hash(password)
+        self.db.commit()
 
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.execute(_select_by_email, {"email": email}).scalar_one_or_none()
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
-        return self.db.query(User).filter(User.username == username).first()
+        return self.db.execute(_select_by_username, {"username": username}).scalar_one_or_none()
+
+    def get_user_by_email_or_username(self, email: str, username: str) -> Optional[User]:
+        """Get a user matching either the email or the username"""
+        return self.db.execute(
+            _select_by_email_or_username, {"email": email, "username": username}
+        ).scalar_one_or_none()
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        # Served from the session's identity map when the user is already loaded
+        return self.db.get(User, user_id)
 
     def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
@@ -47,38 +92,46 @@ class UserRepository:
     def update_user_tokens(self, user_id: int, access_token_hash: str, refresh_token_hash: str, 
                           access_expires: datetime, refresh_expires: datetime) -> bool:
         """Update user's access and refresh tokens"""
-        user = self.get_user_by_id(user_id)
-        if user:
-            user.access_token_hash = access_token_hash
-            user.refresh_token_hash = refresh_token_hash
-            user.access_token_expires_at = access_expires
-            user.refresh_token_expires_at = refresh_expires
-            self.db.commit()
-            return True
-        return False
+        result = self.db.execute(
+            update(User).where(User.id == user_id).values(
+                access_token_hash=access_token_hash,
+                refresh_token_hash=refresh_token_hash,
+                access_token_expires_at=access_expires,
+                refresh_token_expires_at=refresh_expires
+            )
+        )
+        self.db.commit()
+        return result.rowcount > 0
 
     def clear_user_tokens(self, user_id: int) -> bool:
         """Clear user's access and refresh tokens"""
-        user = self.get_user_by_id(user_id)
-        if user:
-            user.access_token_hash = None
-            user.refresh_token_hash = None
-            user.access_token_expires_at = None
-            user.refresh_token_expires_at = None
-            self.db.commit()
-            return True
-        return False
+        return self._clear_tokens(User.id == user_id)
+
+    def clear_tokens_by_access_token(self, access_token_hash: str) -> bool:
+        """Clear the tokens of whichever user holds the given access token"""
+        return self._clear_tokens(User.access_token_hash == access_token_hash)
+
+    def _clear_tokens(self, condition) -> bool:
+        """Clear access and refresh tokens on the user matching the condition"""
+        result = self.db.execute(
+            update(User).where(condition).values(
+                access_token_hash=None,
+                refresh_token_hash=None,
+                access_token_expires_at=None,
+                refresh_token_expires_at=None
+            )
+        )
+        self.db.commit()
+        return result.rowcount > 0
 
     def get_user_by_refresh_token(self, refresh_token_hash: str) -> Optional[User]:
         """Get user by refresh token hash"""
-        return self.db.query(User).filter(
-            User.refresh_token_hash == refresh_token_hash,
-            User.refresh_token_expires_at > datetime.utcnow()
-        ).first()
+        return self.db.execute(
+            _select_by_refresh_token, {"token_hash": refresh_token_hash, "now": datetime.utcnow()}
+        ).scalar_one_or_none()
 
     def get_user_by_access_token(self, access_token_hash: str) -> Optional[User]:
         """Get user by access token hash"""
-        return self.db.query(User).filter(
-            User.access_token_hash == access_token_hash,
-            User.access_token_expires_at > datetime.utcnow()
-        ).first() 
\ No newline at end of file
+        return self.db.execute(
+            _select_by_access_token, {"token_hash": access_token_hash, "now": datetime.utcnow()}
+        ).scalar_one_or_none() 
\ No newline at end of file
@@ -1,24 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.deps import bearer, current_user
+from app.models.user import User
 from app.services.auth_service import AuthService
+from app.schemas.common import MessageResponse
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, RefreshToken
 
 router = APIRouter()
-security = HTTPBearer()
 
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     auth_service = AuthService(db)
-    return auth_service.register_user(user_data)
+    # Password hashing is CPU-bound; keep it off the event loop
+    return await run_in_threadpool(auth_service.register_user, user_data)
 
 @router.post("/login", response_model=Token)
 async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """Login user and return access and refresh tokens"""
     auth_service = AuthService(db)
-    return auth_service.login_user(user_data)
+    return await run_in_threadpool(auth_service.login_user, user_data)
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(refresh_token_data: RefreshToken, db: Session = Depends(get_db)):
@@ -26,8 +30,8 @@ async def refresh_token(refresh_token_data: RefreshToken, db: Session = Depends(
     auth_service = AuthService(db)
     return auth_service.refresh_access_token(refresh_token_data)
 
-@router.post("/logout")
-async def logout(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+@router.post("/logout", response_model=MessageResponse)
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db)):
     """Logout user by clearing tokens"""
     auth_service = AuthService(db)
     success = auth_service.logout_user(credentials.credentials)
@@ -40,15 +44,6 @@ async def logout(credentials: HTTPAuthorizationCredentials = Depends(security),
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_current_user(user: User = Depends(current_user)):
     """Get current user information"""
-    auth_service = AuthService(db)
-    user_info = auth_service.get_current_user(credentials.credentials)
-    if not user_info:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid access token"
-        )
-    
-    user = auth_service.user_repository.get_user_by_id(user_info["id"])
-    return user 
\ No newline at end of file
+    return user
\ No newline at end of file
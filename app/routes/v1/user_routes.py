@@ -1,29 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.auth_service import AuthService
+from app.core.deps import current_user
+from app.models.user import User
 from app.schemas.user import UserResponse
 
 router = APIRouter()
-security = HTTPBearer()
 
 @router.get("/profile", response_model=UserResponse)
-async def get_user_profile(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_user_profile(user: User = Depends(current_user)):
     """Get user profile information"""
-    auth_service = AuthService(db)
-    user_info = auth_service.get_current_user(credentials.credentials)
-    if not user_info:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid access token"
-        )
-    
-    user = auth_service.user_repository.get_user_by_id(user_info["id"])
     return user
 
 @router.put("/profile", response_model=UserResponse)
-async def update_user_profile(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def update_user_profile(user: User = Depends(current_user)):
     """Update user profile information"""
     raise HTTPException(
         status_code=status.HTTP_501_NOT_IMPLEMENTED,
@@ -1,74 +1,99 @@
+from calendar import timegm
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import json
+import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.user import User
 from app.repository.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserLogin, Token, RefreshToken
 from fastapi import HTTPException, status
+from uuid import uuid4
 import hashlib
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_JWT_ALG = settings.JWT_ALGORITHM
+_ACCESS_TTL = timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
+_REFRESH_TTL = timedelta(minutes=settings.JWT_REFRESH_EXPIRE_MINUTES)
+
+# HMAC key preparation in PyJWT re-validates the secret on every call, so
+# sign with a key prepared once at import
+_JWT_SECRET_BYTES = settings.JWT_SECRET.encode()
+_jwt_signer = get_default_algorithms()[_JWT_ALG]
+_jwt_key = _jwt_signer.prepare_key(_JWT_SECRET_BYTES)
+_jwt_header = base64url_encode(
+    json.dumps({"alg": _JWT_ALG, "typ": "JWT"}, separators=(",", ":"), sort_keys=True).encode()
+)
+
+def _encode_jwt(payload: dict) -> str:
+    """Encode and sign a JWT with the pre-built header and key"""
+    claims = dict(payload)
+    claims["exp"] = timegm(claims["exp"].utctimetuple())
+    signing_input = _jwt_header + b"." + base64url_encode(json.dumps(claims, separators=(",", ":")).encode())
+    signature = _jwt_signer.sign(signing_input, _jwt_key)
+    return (signing_input + b"." + base64url_encode(signature)).decode()
 
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
         self.user_repository = UserRepository(db)
 
-    def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None,
+                            expire: Optional[datetime] = None) -> str:
         """Create JWT access token"""
         to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        if expire is None:
+            expire = datetime.utcnow() + (expires_delta or _ACCESS_TTL)
+        to_encode.update({"exp": expire, "jti": uuid4().hex})
+        encoded_jwt = _encode_jwt(to_encode)
         return encoded_jwt
 
-    def create_refresh_token(self, data: dict) -> str:
+    def create_refresh_token(self, data: dict, expire: Optional[datetime] = None) -> str:
         """Create JWT refresh token"""
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(minutes=settings.JWT_REFRESH_EXPIRE_MINUTES)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        if expire is None:
+            expire = datetime.utcnow() + _REFRESH_TTL
+        to_encode.update({"exp": expire, "jti": uuid4().hex})
+        encoded_jwt = _encode_jwt(to_encode)
         return encoded_jwt
 
     def verify_token(self, token: str) -> Optional[dict]:
         """Verify JWT token and return payload"""
         try:
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+            payload = jwt.decode(token, _JWT_SECRET_BYTES, algorithms=[_JWT_ALG])
             return payload
-        except JWTError:
+        except jwt.PyJWTError:
             return None
 
     def hash_token(self, token: str) -> str:
         """Hash token for storage"""
         return hashlib.sha256(token.encode()).hexdigest()
 
-    def authenticate_user(self, email: str, password: str) -> Optional[dict]:
+    def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
         user = self.user_repository.get_user_by_email(email)
         if not user:
             return None
         if not self.user_repository.verify_password(password, user.hashed_password):
             return None
-        return {
-            "id": user.id,
-            "email": user.email,
-            "username": user.username
-        }
+        if self.user_repository.password_needs_rehash(user.hashed_password):
+            self.user_repository.update_password_hash(user, password)
+        return user
 
     def register_user(self, user_data: UserCreate) -> dict:
         """Register a new user"""
-        if self.user_repository.get_user_by_email(user_data.email):
+        existing = self.user_repository.get_user_by_email_or_username(
+            user_data.email, user_data.username
+        )
+        if existing and existing.email == user_data.email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
-        if self.user_repository.get_user_by_username(user_data.username):
+        if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
@@ -84,40 +109,42 @@ class AuthService:
             "created_at": user.created_at
         }
 
+    def issue_tokens(self, user: User) -> Token:
+        """Create and store a new access/refresh token pair for the user"""
+        now = datetime.utcnow()
+        access_expires = now + _ACCESS_TTL
+        refresh_expires = now + _REFRESH_TTL
+
+        access_token = self.create_access_token(data={"sub": user.email}, expire=access_expires)
+        refresh_token = self.create_refresh_token(data={"sub": user.email}, expire=refresh_expires)
+
+        self.user_repository.update_user_tokens(
+            user.id, self.hash_token(access_token), self.hash_token(refresh_token),
+            access_expires, refresh_expires
+        )
+
+        return Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer"
+        )
+
     def login_user(self, user_data: UserLogin) -> Token:
         """Login user and return access and refresh tokens"""
-        user_info = self.authenticate_user(user_data.email, user_data.password)
-        if not user_info:
+        user = self.authenticate_user(user_data.email, user_data.password)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
 
-        user = self.user_repository.get_user_by_id(user_info["id"])
         if not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User account is disabled"
             )
 
-        access_token = self.create_access_token(data={"sub": user.email})
-        refresh_token = self.create_refresh_token(data={"sub": user.email})
-
-        access_token_hash = self.hash_token(access_token)
-        refresh_token_hash = self.hash_token(refresh_token)
-
-        access_expires = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-        refresh_expires = datetime.utcnow() + timedelta(minutes=settings.JWT_REFRESH_EXPIRE_MINUTES)
-
-        self.user_repository.update_user_tokens(
-            user.id, access_token_hash, refresh_token_hash, access_expires, refresh_expires
-        )
-
-        return Token(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer"
-        )
+        return self.issue_tokens(user)
 
     def refresh_access_token(self, refresh_token_data: RefreshToken) -> Token:
         """Refresh access token using refresh token"""
@@ -144,24 +171,7 @@ class AuthService:
                 detail="Invalid refresh token"
             )
 
-        new_access_token = self.create_access_token(data={"sub": user.email})
-        new_refresh_token = self.create_refresh_token(data={"sub": user.email})
-
-        new_access_token_hash = self.hash_token(new_access_token)
-        new_refresh_token_hash = self.hash_token(new_refresh_token)
-
-        access_expires = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-        refresh_expires = datetime.utcnow() + timedelta(minutes=settings.JWT_REFRESH_EXPIRE_MINUTES)
-
-        self.user_repository.update_user_tokens(
-            user.id, new_access_token_hash, new_refresh_token_hash, access_expires, refresh_expires
-        )
-
-        return Token(
-            access_token=new_access_token,
-            refresh_token=new_refresh_token,
-            token_type="bearer"
-        )
+        return self.issue_tokens(user)
 
     def logout_user(self, access_token: str) -> bool:
         """Logout user by clearing tokens"""
@@ -179,16 +189,10 @@ class AuthService:
                 detail="Invalid token payload"
             )
 
-        user = self.user_repository.get_user_by_email(email)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-
-        return self.user_repository.clear_user_tokens(user.id)
+        access_token_hash = self.hash_token(access_token)
+        return self.user_repository.clear_tokens_by_access_token(access_token_hash)
 
-    def get_current_user(self, access_token: str) -> Optional[dict]:
+    def get_current_user(self, access_token: str) -> Optional[User]:
         """Get current user from access token"""
         payload = self.verify_token(access_token)
         if not payload:
@@ -199,15 +203,4 @@ class AuthService:
             return None
 
         access_token_hash = self.hash_token(access_token)
-        user = self.user_repository.get_user_by_access_token(access_token_hash)
-        
-        if not user:
-            return None
-
-        return {
-            "id": user.id,
-            "email": user.email,
-            "username": user.username,
-            "is_active": user.is_active,
-            "is_verified": user.is_verified
-        } 
\ No newline at end of file
+        return self.user_repository.get_user_by_access_token(access_token_hash) 
\ No newline at end of file
@@ -1,10 +1,72 @@
 import re
+import time
+import heapq
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
 import httpx
 from app.core.config import Settings
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+_RE_GPT_VER = re.compile(r'gpt-(\d+)\.(\d+)')
+
+# Provider catalogs change at most daily, so responses are reused for an hour
+_CACHE_TTL = 3600.0
+_catalog_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+_curated_cache: Dict[Tuple, Tuple[float, Dict[str, List['ScoredModel']]]] = {}
+
+# After this many consecutive failures a provider is skipped for the cooldown
+_BREAKER_THRESHOLD = 3
+_BREAKER_COOLDOWN = 60.0
+_breaker: Dict[str, Tuple[int, float]] = {}
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client so provider connections are kept alive between calls"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # httpx already sends Accept-Encoding for the decoders it has installed
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=10)
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared client on application shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@dataclass(slots=True, frozen=True)
+class ScoredModel:
+    """A curated model entry; lower score = better"""
+    id: str
+    name: str
+    provider: str
+    category: str
+    cost_tier: str
+    score: int
+    recommended: bool
+    available: bool = True
+
 
 class SmartModelSelector:
     """
@@ -35,7 +97,29 @@ class SmartModelSelector:
         'claude-3-haiku': {'priority': 4, 'category': 'fast', 'cost_tier': 'budget'}
     }
 
+    # Flattened (pattern, priority, category, cost_tier) rows in match order,
+    # built once so scoring avoids per-call dict iteration and lookups
+    _OPENAI_PATTERNS = tuple((p, i['priority'], i['category'], i['cost_tier']) for p, i in OPENAI_SCORING.items())
+    _GEMINI_PATTERNS = tuple((p, i['priority'], i['category'], i['cost_tier']) for p, i in GEMINI_SCORING.items())
+    _CLAUDE_PATTERNS = tuple((p, i['priority'], i['category'], i['cost_tier']) for p, i in CLAUDE_BASE_PATTERNS.items())
+
+    # Bit positions for ensure_model_diversity's seen-category mask
+    _CATEGORY_BITS = {'latest': 0, 'advanced': 1, 'standard': 2, 'fast': 3, 'unknown': 4}
+
+    # Models released within this window count as "latest"
+    LATEST_WINDOW = timedelta(days=180)
+
+    # Special cases for known latest models
+    LATEST_INDICATORS = (
+        'gpt-4o',  # Latest OpenAI
+        'gpt-4.1',  # Even newer OpenAI
+        'claude-3-5',  # Latest Claude
+        'gemini-1.5'  # Latest Gemini
+    )
+    _LATEST_RE = re.compile('|'.join(map(re.escape, LATEST_INDICATORS)))
+
     @classmethod
+    @lru_cache(maxsize=1024)
     def extract_model_date(cls, model_id: str) -> Optional[datetime]:
         """
         Extract date from model IDs like:
@@ -44,73 +128,72 @@ class SmartModelSelector:
         - 'gpt-4.1-mini-2025-04-14'
         """
         # Pattern for YYYY-MM-DD (OpenAI style)
-        date_match = re.search(r'(\d{4})-(\d{2})-(\d{2})', model_id)
-        if date_match:
-            try:
-                year, month, day = date_match.groups()
-                return datetime(int(year), int(month), int(day))
-            except ValueError:
-                pass
+        parts = model_id.split('-')
+        for i in range(len(parts) - 2):
+            year, month, day = parts[i:i + 3]
+            if len(year) == 4 and len(month) == 2 and len(day) == 2 and (year + month + day).isdigit():
+                try:
+                    return datetime(int(year), int(month), int(day))
+                except ValueError:
+                    pass
 
         # Pattern for YYYYMMDD (Claude style)
-        date_match = re.search(r'(\d{8})$', model_id)
-        if date_match:
+        tail = model_id[-8:]
+        if len(tail) == 8 and tail.isdigit():
             try:
-                return datetime.strptime(date_match.group(1), '%Y%m%d')
+                return datetime(int(tail[:4]), int(tail[4:6]), int(tail[6:]))
             except ValueError:
                 pass
 
         # Pattern for version numbers like 4.1 (treat as newer)
-        version_match = re.search(r'gpt-(\d+)\.(\d+)', model_id)
-        if version_match:
-            major, minor = version_match.groups()
-            # Treat version as pseudo-date (higher version = more recent)
-            base_date = datetime(2024, 1, 1)
-            return base_date + timedelta(days=int(major) * 365 + int(minor) * 30)
+        if 'gpt-' in model_id and '.' in model_id:
+            version_match = _RE_GPT_VER.search(model_id)
+            if version_match:
+                major, minor = version_match.groups()
+                # Treat version as pseudo-date (higher version = more recent)
+                base_date = datetime(2024, 1, 1)
+                return base_date + timedelta(days=int(major) * 365 + int(minor) * 30)
 
         return None
 
     @classmethod
-    def is_latest_version(cls, model_id: str) -> bool:
+    @lru_cache(maxsize=1024)
+    def is_latest_version(cls, model_id: str, today: datetime) -> bool:
         """
         Check if model is marked as 'latest' or is very recent
         """
-        if 'latest' in model_id.lower():
+        return cls._is_latest(model_id.lower(), cls.extract_model_date(model_id), today)
+
+    @classmethod
+    def _is_latest(cls, lower: str, model_date: Optional[datetime], today: datetime) -> bool:
+        """is_latest_version on an already lowercased ID and parsed date"""
+        if 'latest' in lower:
             return True
 
-        model_date = cls.extract_model_date(model_id)
         if model_date:
             # Consider models from last 6 months as "latest"
-            cutoff_date = datetime.now() - timedelta(days=180)
-            return model_date >= cutoff_date
-
-        # Special cases for known latest models
-        latest_indicators = [
-            'gpt-4o',  # Latest OpenAI
-            'gpt-4.1',  # Even newer OpenAI
-            'claude-3-5',  # Latest Claude
-            'gemini-1.5'  # Latest Gemini
-        ]
+            return model_date >= today - cls.LATEST_WINDOW
 
-        return any(indicator in model_id.lower() for indicator in latest_indicators)
+        return cls._LATEST_RE.search(lower) is not None
 
     @classmethod
-    def score_openai_model(cls, model_id: str) -> Tuple[int, int, str, str]:
+    @lru_cache(maxsize=1024)
+    def score_openai_model(cls, model_id: str, today: datetime) -> Tuple[int, int, str, str]:
         """
         IMPROVED scoring with better latest detection
         Score OpenAI models: (priority, bonus_score, category, cost_tier)
         Lower priority number = higher priority
         """
         # Get base scoring
-        for pattern, info in cls.OPENAI_SCORING.items():
-            if pattern in model_id.lower():
+        lower = model_id.lower()
+        for pattern, priority, category, cost_tier in cls._OPENAI_PATTERNS:
+            if pattern in lower:
                 bonus = 0
-                category = info['category']
 
                 # IMPROVED: Date-based scoring
                 model_date = cls.extract_model_date(model_id)
                 if model_date:
-                    days_old = (datetime.now() - model_date).days
+                    days_old = (today - model_date).days
                     if days_old < 30:  # Very recent
                         bonus += 25
                         category = 'latest'
@@ -131,25 +214,26 @@ class SmartModelSelector:
                     bonus += 20
 
                 # Bonus for 'latest' keyword
-                if cls.is_latest_version(model_id):
+                if cls._is_latest(lower, model_date, today):
                     bonus += 15
 
                 return (
-                    info['priority'],
+                    priority,
                     bonus,
                     category,
-                    info['cost_tier']
+                    cost_tier
                 )
 
         return (99, 0, 'unknown', 'unknown')
 
     @classmethod
+    @lru_cache(maxsize=1024)
     def score_gemini_model(cls, model_id: str) -> Tuple[int, int, str, str]:
         """IMPROVED Gemini scoring with latest detection"""
-        for pattern, info in cls.GEMINI_SCORING.items():
-            if pattern in model_id.lower():
+        lower = model_id.lower()
+        for pattern, priority, category, cost_tier in cls._GEMINI_PATTERNS:
+            if pattern in lower:
                 bonus = 0
-                category = info['category']
 
                 # Big bonus for 'latest' versions
                 if 'latest' in model_id:
@@ -168,26 +252,27 @@ class SmartModelSelector:
                     bonus += 8
 
                 return (
-                    info['priority'],
+                    priority,
                     bonus,
                     category,
-                    info['cost_tier']
+                    cost_tier
                 )
 
         return (99, 0, 'unknown', 'unknown')
 
     @classmethod
-    def score_claude_model(cls, model_id: str) -> Tuple[int, int, str, str]:
+    @lru_cache(maxsize=1024)
+    def score_claude_model(cls, model_id: str, today: datetime) -> Tuple[int, int, str, str]:
         """IMPROVED Claude scoring with better date handling"""
-        for pattern, info in cls.CLAUDE_BASE_PATTERNS.items():
-            if pattern in model_id.lower():
+        lower = model_id.lower()
+        for pattern, priority, category, cost_tier in cls._CLAUDE_PATTERNS:
+            if pattern in lower:
                 bonus = 0
-                category = info['category']
 
                 # IMPROVED: Parse date for recency bonus
                 model_date = cls.extract_model_date(model_id)
                 if model_date:
-                    days_old = (datetime.now() - model_date).days
+                    days_old = (today - model_date).days
                     if days_old < 30:  # Very recent
                         bonus += 30
                         category = 'latest'
@@ -204,304 +289,374 @@ class SmartModelSelector:
                     category = 'latest'
 
                 return (
-                    info['priority'],
+                    priority,
                     bonus,
                     category,
-                    info['cost_tier']
+                    cost_tier
                 )
 
         return (99, 0, 'unknown', 'unknown')
 
     @classmethod
-    def ensure_model_diversity(cls, sorted_models: List[Dict], max_count: int) -> List[Dict]:
+    def ensure_model_diversity(cls, sorted_models: List[ScoredModel], max_count: int) -> List[ScoredModel]:
         """
         IMPROVED diversity ensuring we get mix of latest + efficient models
         """
-        if not sorted_models:
-            return []
-
         selected = []
+        fillers = []
+        categories_seen = 0
 
-        # STEP 1: Always include the absolute best model
-        if sorted_models:
-            selected.append(sorted_models[0])
-
-        # STEP 2: Ensure category diversity (latest, fast, advanced)
-        categories_seen = {sorted_models[0]['category']}
-
-        for model in sorted_models[1:]:
-            if len(selected) >= max_count:
-                break
-
-            model_category = model['category']
-
-            # Prefer models from different categories
-            if model_category not in categories_seen:
-                selected.append(model)
-                categories_seen.add(model_category)
-
-        # STEP 3: Fill remaining slots with highest-scoring models
+        # Walk once: the first model of each category is a diverse pick,
+        # everything else fills remaining slots in score order
         for model in sorted_models:
-            if len(selected) >= max_count:
-                break
-            if model not in selected:
+            bit = 1 << cls._CATEGORY_BITS.get(model.category, 4)
+            if not categories_seen & bit and len(selected) < max_count:
                 selected.append(model)
+                categories_seen |= bit
+            else:
+                fillers.append(model)
 
-        return selected[:max_count]
+        selected.extend(fillers[:max_count - len(selected)])
+        return selected
 
     @classmethod
-    async def get_curated_models(cls, settings: Settings, max_per_provider: int = 2) -> Dict[str, List[Dict]]:
+    async def get_curated_models(cls, settings: Settings, max_per_provider: int = 2) -> Dict[str, List[ScoredModel]]:
         """
         MAIN METHOD: Get automatically curated best models from each provider
         IMPROVED with better error handling and fallbacks
         """
+        cache_key = (settings.OPENAI_API_KEY, settings.GEMINI_API_KEY, settings.ANTHROPIC_API_KEY, max_per_provider)
+        cached = _curated_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _CACHE_TTL:
+            return cached[1]
+
+        # Scores are cached per model and day, so pin "today" once per run
+        today = cls._today()
         curated = {
             'openai': [],
             'anthropic': [],
             'google': []
         }
 
-        async with httpx.AsyncClient(timeout=15.0) as client:  # Increased timeout
-
-            # === OpenAI Model Curation ===
-            if settings.OPENAI_API_KEY:
-                try:
-                    print("🔍 Fetching OpenAI models...")
-                    response = await client.get(
-                        "https://api.openai.com/v1/models",
-                        headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
-                    )
-                    response.raise_for_status()
-                    all_openai = response.json().get('data', [])
-
-                    # Score and filter OpenAI models
-                    scored_openai = []
-                    for model in all_openai:
-                        model_id = model['id']
-                        if not model_id.startswith('gpt'):
-                            continue
-
-                        priority, bonus, category, cost_tier = cls.score_openai_model(model_id)
-
-                        # Only include models we recognize
-                        if priority < 99:
-                            scored_openai.append({
-                                'id': model_id,
-                                'name': cls.format_openai_name(model_id),
-                                'provider': 'openai',
-                                'category': category,
-                                'cost_tier': cost_tier,
-                                'score': priority - bonus,  # Lower = better
-                                'recommended': category == 'latest' or cls.is_latest_version(model_id),
-                                'available': True
-                            })
-
-                    # Select best models with diversity
-                    curated['openai'] = cls.ensure_model_diversity(
-                        sorted(scored_openai, key=lambda x: x['score']),
-                        max_per_provider
-                    )
-
-                    print(f"✅ Selected OpenAI models: {[m['id'] for m in curated['openai']]}")
-
-                except Exception as e:
-                    print(f"❌ OpenAI model curation failed: {e}")
-                    # Add fallback models
-                    curated['openai'] = cls._get_fallback_openai_models()[:max_per_provider]
-
-            # === Gemini Model Curation ===
-            if settings.GOOGLE_API_KEY:
-                try:
-                    print("🔍 Fetching Gemini models...")
-                    response = await client.get(
-                        f"https://generativelanguage.googleapis.com/v1beta/models?key={settings.GOOGLE_API_KEY}"
-                    )
-                    response.raise_for_status()
-                    all_gemini = response.json().get('models', [])
-
-                    scored_gemini = []
-                    for model in all_gemini:
-                        if 'generateContent' not in model.get('supportedGenerationMethods', []):
-                            continue
-
-                        # Remove 'models/' prefix if present
-                        model_id = model['name'].replace('models/', '')
-                        if not 'gemini' in model_id.lower():
-                            continue
-
-                        priority, bonus, category, cost_tier = cls.score_gemini_model(model_id)
-
-                        if priority < 99:
-                            scored_gemini.append({
-                                'id': model_id,
-                                'name': cls.format_gemini_name(model_id),
-                                'provider': 'google',
-                                'category': category,
-                                'cost_tier': cost_tier,
-                                'score': priority - bonus,
-                                'recommended': cls.is_latest_version(model_id) or category == 'latest',
-                                'available': True
-                            })
-
-                    # Ensure fallback if no models found
-                    if not scored_gemini:
-                        scored_gemini = cls._get_fallback_gemini_models()
-
-                    curated['google'] = cls.ensure_model_diversity(
-                        sorted(scored_gemini, key=lambda x: x['score']),
-                        max_per_provider
-                    )
-
-                    print(f"✅ Selected Gemini models: {[m['id'] for m in curated['google']]}")
-
-                except Exception as e:
-                    print(f"❌ Gemini model curation failed: {e}")
-                    curated['google'] = cls._get_fallback_gemini_models()[:max_per_provider]
-
-            # === Claude Model Curation ===
-            if settings.ANTHROPIC_API_KEY:
-                print("🔍 Curating Claude models...")
-                # Use known Claude models since Anthropic doesn't have public endpoint
-                claude_candidates = [
-                    'claude-3-5-sonnet-20240620',  # Latest
-                    'claude-3-5-haiku-20241022',  # Latest fast
-                    'claude-3-opus-20240229',  # Most powerful
-                    'claude-3-sonnet-20240229',  # Balanced
-                    'claude-3-haiku-20240307'  # Fast
-                ]
-
-                scored_claude = []
-                for model_id in claude_candidates:
-                    priority, bonus, category, cost_tier = cls.score_claude_model(model_id)
-
-                    scored_claude.append({
-                        'id': model_id,
-                        'name': cls.format_claude_name(model_id),
-                        'provider': 'anthropic',
-                        'category': category,
-                        'cost_tier': cost_tier,
-                        'score': priority - bonus,
-                        'recommended': cls.is_latest_version(model_id) or category == 'latest',
-                        'available': True
-                    })
-
-                curated['anthropic'] = cls.ensure_model_diversity(
-                    sorted(scored_claude, key=lambda x: x['score']),
-                    max_per_provider
+        client = get_http_client()
+
+        # === OpenAI and Gemini Model Curation (fetched concurrently) ===
+        tasks = {}
+        if settings.OPENAI_API_KEY:
+            tasks['openai'] = cls._curate_openai(client, settings, max_per_provider, today)
+        if settings.GEMINI_API_KEY:
+            tasks['google'] = cls._curate_gemini(client, settings, max_per_provider, today)
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        failed = False
+        for provider, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.warning("%s model curation failed: %s", provider.title(), result)
+                failed = True
+                # Add fallback models
+                fallback = (
+                    cls._get_fallback_openai_models() if provider == 'openai'
+                    else cls._get_fallback_gemini_models()
                 )
-
-                print(f"✅ Selected Claude models: {[m['id'] for m in curated['anthropic']]}")
+                curated[provider] = fallback[:max_per_provider]
+            else:
+                curated[provider] = result
+
+        # === Claude Model Curation ===
+        if settings.ANTHROPIC_API_KEY:
+            logger.debug("Curating Claude models...")
+            # Use known Claude models since Anthropic doesn't have public endpoint
+            claude_candidates = [
+                'claude-3-5-sonnet-20240620',  # Latest
+                'claude-3-5-haiku-20241022',  # Latest fast
+                'claude-3-opus-20240229',  # Most powerful
+                'claude-3-sonnet-20240229',  # Balanced
+                'claude-3-haiku-20240307'  # Fast
+            ]
+
+            scored_claude = [(model_id, cls.score_claude_model(model_id, today)) for model_id in claude_candidates]
+
+            curated['anthropic'] = cls._select_models(
+                scored_claude, 'anthropic', cls.format_claude_name, max_per_provider, today
+            )
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Selected Claude models: %s", [m.id for m in curated['anthropic']])
 
         # Debug output
-        for provider, models in curated.items():
-            if models:
-                print(f"🎯 {provider.title()}: {len(models)} models selected")
-                for model in models:
-                    print(f"   - {model['id']} (score: {model['score']}, {model['category']})")
+        if logger.isEnabledFor(logging.DEBUG):
+            for provider, models in curated.items():
+                if models:
+                    logger.debug("%s: %d models selected", provider.title(), len(models))
+                    for model in models:
+                        logger.debug("   - %s (score: %s, %s)", model.id, model.score, model.category)
+
+        # Don't pin fallbacks for an hour when a provider was unreachable
+        if not failed:
+            _curated_cache[cache_key] = (time.monotonic(), curated)
 
         return curated
 
+    @classmethod
+    async def _fetch_catalog(
+        cls, client: httpx.AsyncClient, provider: str, url: str, key: str, headers: Optional[Dict[str, str]] = None
+    ) -> List[Dict]:
+        """Fetch a provider's model list with a TTL cache and failure breaker"""
+        cached = _catalog_cache.get(provider)
+        if cached and time.monotonic() - cached[0] < _CACHE_TTL:
+            return cached[1]
+
+        fail_count, last_fail = _breaker.get(provider, (0, 0.0))
+        if fail_count >= _BREAKER_THRESHOLD and time.monotonic() - last_fail < _BREAKER_COOLDOWN:
+            raise RuntimeError(f"{provider} is unavailable, skipping fetch")
+
+        try:
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+            models = _loads(response.content).get(key, [])
+        except Exception:
+            _breaker[provider] = (fail_count + 1, time.monotonic())
+            raise
+
+        _breaker.pop(provider, None)
+        _catalog_cache[provider] = (time.monotonic(), models)
+        return models
+
+    @classmethod
+    async def _curate_openai(
+        cls, client: httpx.AsyncClient, settings: Settings, max_per_provider: int, today: datetime
+    ) -> List[ScoredModel]:
+        """Fetch, score and select OpenAI models"""
+        logger.debug("Fetching OpenAI models...")
+        all_openai = await cls._fetch_catalog(
+            client,
+            'openai',
+            "https://api.openai.com/v1/models",
+            'data',
+            headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+        )
+
+        # Score and filter OpenAI models
+        scored_openai = []
+        for model in all_openai:
+            model_id = model['id']
+            if not model_id.startswith('gpt'):
+                continue
+
+            score = cls.score_openai_model(model_id, today)
+
+            # Only include models we recognize
+            if score[0] < 99:
+                scored_openai.append((model_id, score))
+
+        # Select best models with diversity
+        selected = cls._select_models(scored_openai, 'openai', cls.format_openai_name, max_per_provider, today)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Selected OpenAI models: %s", [m.id for m in selected])
+        return selected
+
+    @classmethod
+    async def _curate_gemini(
+        cls, client: httpx.AsyncClient, settings: Settings, max_per_provider: int, today: datetime
+    ) -> List[ScoredModel]:
+        """Fetch, score and select Gemini models"""
+        logger.debug("Fetching Gemini models...")
+        all_gemini = await cls._fetch_catalog(
+            client,
+            'google',
+            f"https://generativelanguage.googleapis.com/v1beta/models?key={settings.GEMINI_API_KEY}",
+            'models'
+        )
+
+        scored_gemini = []
+        for model in all_gemini:
+            if 'generateContent' not in model.get('supportedGenerationMethods', []):
+                continue
+
+            # Remove 'models/' prefix if present
+            model_id = model['name'].replace('models/', '')
+            if not 'gemini' in model_id.lower():
+                continue
+
+            score = cls.score_gemini_model(model_id)
+
+            if score[0] < 99:
+                scored_gemini.append((model_id, score))
+
+        # Ensure fallback if no models found
+        if scored_gemini:
+            selected = cls._select_models(scored_gemini, 'google', cls.format_gemini_name, max_per_provider, today)
+        else:
+            selected = cls.ensure_model_diversity(
+                sorted(cls._get_fallback_gemini_models(), key=lambda x: x.score),
+                max_per_provider
+            )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Selected Gemini models: %s", [m.id for m in selected])
+        return selected
+
     # === HELPER METHODS ===
 
     @classmethod
-    def _get_fallback_openai_models(cls) -> List[Dict]:
+    def _select_models(
+        cls,
+        candidates: List[Tuple[str, Tuple[int, int, str, str]]],
+        provider: str,
+        formatter: Callable[[str], str],
+        max_count: int,
+        today: datetime
+    ) -> List[ScoredModel]:
+        """Run ensure_model_diversity over (model_id, score) pairs, building
+        ScoredModel entries only for the candidates it could pick"""
+        def rank(candidate):
+            priority, bonus, _, _ = candidate[1]
+            return priority - bonus
+
+        # Diversity only ever picks from the overall top max_count and the
+        # best model of each category, so the rest are never built or sorted
+        keep = {model_id for model_id, _ in heapq.nsmallest(max_count, candidates, key=rank)}
+        best_by_category = {}
+        for candidate in candidates:
+            category = candidate[1][2]
+            if category not in best_by_category or rank(candidate) < rank(best_by_category[category]):
+                best_by_category[category] = candidate
+        keep.update(model_id for model_id, _ in best_by_category.values())
+
+        finalists = [
+            cls._build_scored(model_id, provider, score, formatter(model_id), today)
+            for model_id, score in candidates
+            if model_id in keep
+        ]
+        return cls.ensure_model_diversity(sorted(finalists, key=lambda x: x.score), max_count)
+
+    @classmethod
+    def _build_scored(
+        cls, model_id: str, provider: str, score: Tuple[int, int, str, str], name: str, today: datetime
+    ) -> ScoredModel:
+        """Build a ScoredModel from a score_* result"""
+        priority, bonus, category, cost_tier = score
+        return ScoredModel(
+            id=model_id,
+            name=name,
+            provider=provider,
+            category=category,
+            cost_tier=cost_tier,
+            score=priority - bonus,  # Lower = better
+            recommended=category == 'latest' or cls.is_latest_version(model_id, today)
+        )
+
+    @staticmethod
+    def _today() -> datetime:
+        """Current date at midnight, used as the cache key for date-based scoring"""
+        return datetime.combine(date.today(), datetime.min.time())
+
+    @classmethod
+    def _get_fallback_openai_models(cls) -> List[ScoredModel]:
         """Fallback OpenAI models with real, latest IDs"""
         return [
-            {
-                'id': 'gpt-4o-mini',
-                'name': 'GPT-4o Mini',
-                'provider': 'openai',
-                'category': 'latest',
-                'cost_tier': 'premium',
-                'score': -15,
-                'recommended': True,
-                'available': True
-            },
-            {
-                'id': 'gpt-4o',
-                'name': 'GPT-4o',
-                'provider': 'openai',
-                'category': 'latest',
-                'cost_tier': 'premium',
-                'score': -10,
-                'recommended': True,
-                'available': True
-            }
+            ScoredModel(
+                id='gpt-4o-mini',
+                name='GPT-4o Mini',
+                provider='openai',
+                category='latest',
+                cost_tier='premium',
+                score=-15,
+                recommended=True,
+                available=True
+            ),
+            ScoredModel(
+                id='gpt-4o',
+                name='GPT-4o',
+                provider='openai',
+                category='latest',
+                cost_tier='premium',
+                score=-10,
+                recommended=True,
+                available=True
+            )
         ]
 
     @classmethod
-    def _get_fallback_gemini_models(cls) -> List[Dict]:
+    def _get_fallback_gemini_models(cls) -> List[ScoredModel]:
         """Fallback Gemini models"""
         return [
-            {
-                'id': 'gemini-1.5-pro-latest',
-                'name': 'Gemini 1.5 Pro',
-                'provider': 'google',
-                'category': 'latest',
-                'cost_tier': 'premium',
-                'score': -14,
-                'recommended': True,
-                'available': True
-            },
-            {
-                'id': 'gemini-1.5-flash-latest',
-                'name': 'Gemini 1.5 Flash',
-                'provider': 'google',
-                'category': 'fast',
-                'cost_tier': 'standard',
-                'score': -21,
-                'recommended': True,
-                'available': True
-            }
+            ScoredModel(
+                id='gemini-1.5-pro-latest',
+                name='Gemini 1.5 Pro',
+                provider='google',
+                category='latest',
+                cost_tier='premium',
+                score=-14,
+                recommended=True,
+                available=True
+            ),
+            ScoredModel(
+                id='gemini-1.5-flash-latest',
+                name='Gemini 1.5 Flash',
+                provider='google',
+                category='fast',
+                cost_tier='standard',
+                score=-21,
+                recommended=True,
+                available=True
+            )
         ]
 
     # === FORMATTING METHODS (keep existing) ===
 
+    # Display names as (substring, name) rows, checked in order so the most
+    # specific substring wins
+    OPENAI_NAMES = (
+        ('gpt-4o-mini', 'GPT-4o Mini'),
+        ('gpt-4.1', 'GPT-4.1'),
+        ('gpt-4o', 'GPT-4o'),
+        ('gpt-4-turbo', 'GPT-4 Turbo'),
+        ('gpt-4', 'GPT-4'),
+        ('gpt-3.5', 'GPT-3.5 Turbo')
+    )
+
+    GEMINI_NAMES = (
+        ('gemini-1.5-pro', 'Gemini 1.5 Pro'),
+        ('gemini-1.5-flash', 'Gemini 1.5 Flash'),
+        ('gemini-pro', 'Gemini Pro')
+    )
+
+    CLAUDE_NAMES = (
+        ('claude-3-5-sonnet', 'Claude 3.5 Sonnet'),
+        ('claude-3-5-haiku', 'Claude 3.5 Haiku'),
+        ('claude-3-opus', 'Claude 3 Opus'),
+        ('claude-3-sonnet', 'Claude 3 Sonnet'),
+        ('claude-3-haiku', 'Claude 3 Haiku')
+    )
+
+    @staticmethod
+    def _lookup_name(model_id: str, names: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+        """Return the display name of the first matching substring"""
+        for pattern, name in names:
+            if pattern in model_id:
+                return name
+        return None
+
     @classmethod
+    @lru_cache(maxsize=1024)
     def format_openai_name(cls, model_id: str) -> str:
         """Format OpenAI model ID to user-friendly name"""
-        if 'gpt-4o-mini' in model_id:
-            return 'GPT-4o Mini'
-        elif 'gpt-4.1' in model_id:
-            return 'GPT-4.1'  # NEW: Handle GPT-4.1
-        elif 'gpt-4o' in model_id:
-            return 'GPT-4o'
-        elif 'gpt-4-turbo' in model_id:
-            return 'GPT-4 Turbo'
-        elif 'gpt-4' in model_id:
-            return 'GPT-4'
-        elif 'gpt-3.5' in model_id:
-            return 'GPT-3.5 Turbo'
-
         # Fallback: clean up the ID
-        name = model_id.upper().replace('-', ' ')
-        return name.title()
+        return cls._lookup_name(model_id, cls.OPENAI_NAMES) or model_id.upper().replace('-', ' ').title()
 
     @classmethod
+    @lru_cache(maxsize=1024)
     def format_gemini_name(cls, model_id: str) -> str:
         """Format Gemini model ID to user-friendly name"""
-        if 'gemini-1.5-pro' in model_id:
-            return 'Gemini 1.5 Pro'
-        elif 'gemini-1.5-flash' in model_id:
-            return 'Gemini 1.5 Flash'
-        elif 'gemini-pro' in model_id:
-            return 'Gemini Pro'
-        return model_id.replace('-', ' ').title()
+        return cls._lookup_name(model_id, cls.GEMINI_NAMES) or model_id.replace('-', ' ').title()
 
     @classmethod
+    @lru_cache(maxsize=1024)
     def format_claude_name(cls, model_id: str) -> str:
         """Format Claude model ID to user-friendly name"""
-        if 'claude-3-5-sonnet' in model_id:
-            return 'Claude 3.5 Sonnet'
-        elif 'claude-3-5-haiku' in model_id:
-            return 'Claude 3.5 Haiku'
-        elif 'claude-3-opus' in model_id:
-            return 'Claude 3 Opus'
-        elif 'claude-3-sonnet' in model_id:
-            return 'Claude 3 Sonnet'
-        elif 'claude-3-haiku' in model_id:
-            return 'Claude 3 Haiku'
-        return model_id.replace('-', ' ').title()
+        return cls._lookup_name(model_id, cls.CLAUDE_NAMES) or model_id.replace('-', ' ').title()
 
     @classmethod
     async def get_recommended_defaults(cls, settings: Settings) -> Dict[str, str]:
@@ -512,10 +667,10 @@ class SmartModelSelector:
 
         defaults = {}
         if curated['openai']:
-            defaults['openai'] = curated['openai'][0]['id']
+            defaults['openai'] = curated['openai'][0].id
         if curated['google']:
-            defaults['google'] = curated['google'][0]['id']
+            defaults['google'] = curated['google'][0].id
         if curated['anthropic']:
-            defaults['anthropic'] = curated['anthropic'][0]['id']
+            defaults['anthropic'] = curated['anthropic'][0].id
 
         return defaults
\ No newline at end of file
@@ -0,0 +1,11 @@
+import pytest
+from argon2 import PasswordHasher
+
+# Minimum argon2 cost: tests check hashing behaviour, not resistance to brute force
+_fast_password_hasher = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+
+@pytest.fixture(autouse=True)
+def fast_password_hasher(monkeypatch):
+    """Swap the production password hasher for a low-cost one during tests"""
+    monkeypatch.setattr("app.repository.user_repository.password_hasher", _fast_password_hasher)
+    return _fast_password_hasher
@@ -1,15 +1,20 @@
 import pytest
 from unittest.mock import Mock, patch
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.models.user import User
 from app.services.auth_service import AuthService
 from app.schemas.user import UserCreate, UserLogin, RefreshToken
+from app.core.config import settings
 from fastapi import HTTPException
+import jwt
 
 class TestAuthService:
     def setup_method(self):
         """Setup method for each test"""
-        self.mock_db = Mock()
+        self.mock_db = Mock(spec=Session)
         self.auth_service = AuthService(self.mock_db)
+        self.auth_service.user_repository = Mock()
 
     def test_create_access_token(self):
         """Test creating access token"""
@@ -33,6 +38,24 @@ class TestAuthService:
         assert payload is not None
         assert payload["sub"] == "test@example.com"
 
+    def test_tokens_are_unique(self):
+        """Test tokens issued for the same subject in the same second differ"""
+        data = {"sub": "test@example.com"}
+        first = self.auth_service.create_access_token(data)
+        second = self.auth_service.create_access_token(data)
+        assert first != second
+        assert self.auth_service.verify_token(first)["jti"] != self.auth_service.verify_token(second)["jti"]
+
+    def test_create_access_token_matches_pyjwt(self):
+        """Test the pre-keyed signer produces the same token as PyJWT"""
+        expire = datetime(2030, 1, 1)
+        data = {"sub": "test@example.com", "exp": expire}
+        token = self.auth_service.create_access_token({"sub": "test@example.com"}, expire=expire)
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        expected = jwt.encode({**data, "jti": payload["jti"]}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        assert jwt.get_unverified_header(token) == jwt.get_unverified_header(expected)
+        assert payload == jwt.decode(expected, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
     def test_verify_token_invalid(self):
         """Test verifying invalid token"""
         payload = self.auth_service.verify_token("invalid_token")
@@ -47,19 +70,32 @@ class TestAuthService:
 
     def test_authenticate_user_success(self):
         """Test successful user authentication"""
-        mock_user = Mock()
-        mock_user.id = 1
-        mock_user.email = "test@example.com"
-        mock_user.username = "testuser"
-        mock_user.hashed_password = "hashed_password"
+        mock_user = Mock(
+            spec=User,
+            id=1,
+            email="test@example.com",
+            username="testuser",
+            hashed_password="hashed_password"
+        )
         
         self.auth_service.user_repository.get_user_by_email.return_value = mock_user
         self.auth_service.user_repository.verify_password.return_value = True
+        self.auth_service.user_repository.password_needs_rehash.return_value = False
         
         result = self.auth_service.authenticate_user("test@example.com", "password")
-        assert result is not None
-        assert result["id"] == 1
-        assert result["email"] == "test@example.com"
+        assert result is mock_user
+        self.auth_service.user_repository.update_password_hash.assert_not_called()
+
+    def test_authenticate_user_rehashes_legacy_hash(self):
+        """Test successful authentication upgrades an outdated password hash"""
+        mock_user = Mock(spec=User, hashed_password="$2b$12$legacy")
+        
+        self.auth_service.user_repository.get_user_by_email.return_value = mock_user
+        self.auth_service.user_repository.verify_password.return_value = True
+        self.auth_service.user_repository.password_needs_rehash.return_value = True
+        
+        self.auth_service.authenticate_user("test@example.com", "password")
+        self.auth_service.user_repository.update_password_hash.assert_called_once_with(mock_user, "password")
 
     def test_authenticate_user_invalid_email(self):
         """Test authentication with invalid email"""
@@ -70,8 +106,7 @@ class TestAuthService:
 
     def test_authenticate_user_invalid_password(self):
         """Test authentication with invalid password"""
-        mock_user = Mock()
-        mock_user.hashed_password = "hashed_password"
+        mock_user = Mock(spec=User, hashed_password="hashed_password")
         
         self.auth_service.user_repository.get_user_by_email.return_value = mock_user
         self.auth_service.user_repository.verify_password.return_value = False
@@ -82,16 +117,17 @@ class TestAuthService:
     def test_register_user_success(self):
         """Test successful user registration"""
         user_data = UserCreate(email="test@example.com", username="testuser", password="password")
-        mock_user = Mock()
-        mock_user.id = 1
-        mock_user.email = "test@example.com"
-        mock_user.username = "testuser"
-        mock_user.is_active = True
-        mock_user.is_verified = False
-        mock_user.created_at = datetime.utcnow()
-        
-        self.auth_service.user_repository.get_user_by_email.return_value = None
-        self.auth_service.user_repository.get_user_by_username.return_value = None
+        mock_user = Mock(
+            spec=User,
+            id=1,
+            email="test@example.com",
+            username="testuser",
+            is_active=True,
+            is_verified=False,
+            created_at=datetime.utcnow()
+        )
+        
+        self.auth_service.user_repository.get_user_by_email_or_username.return_value = None
         self.auth_service.user_repository.create_user.return_value = mock_user
         
         result = self.auth_service.register_user(user_data)
@@ -102,7 +138,7 @@ class TestAuthService:
         """Test registration with existing email"""
         user_data = UserCreate(email="existing@example.com", username="testuser", password="password")
         
-        self.auth_service.user_repository.get_user_by_email.return_value = Mock()
+        self.auth_service.user_repository.get_user_by_email_or_username.return_value = Mock(spec=User, email="existing@example.com")
         
         with pytest.raises(HTTPException) as exc_info:
             self.auth_service.register_user(user_data)
@@ -113,8 +149,7 @@ class TestAuthService:
         """Test registration with existing username"""
         user_data = UserCreate(email="test@example.com", username="existinguser", password="password")
         
-        self.auth_service.user_repository.get_user_by_email.return_value = None
-        self.auth_service.user_repository.get_user_by_username.return_value = Mock()
+        self.auth_service.user_repository.get_user_by_email_or_username.return_value = Mock(spec=User, email="other@example.com")
         
         with pytest.raises(HTTPException) as exc_info:
             self.auth_service.register_user(user_data)
@@ -124,20 +159,29 @@ class TestAuthService:
     def test_login_user_success(self):
         """Test successful user login"""
         user_data = UserLogin(email="test@example.com", password="password")
-        mock_user = Mock()
-        mock_user.id = 1
-        mock_user.email = "test@example.com"
-        mock_user.is_active = True
+        mock_user = Mock(spec=User, id=1, email="test@example.com", is_active=True)
         
-        self.auth_service.authenticate_user = Mock(return_value={"id": 1, "email": "test@example.com", "username": "testuser"})
-        self.auth_service.user_repository.get_user_by_id.return_value = mock_user
+        self.auth_service.authenticate_user = Mock(return_value=mock_user)
         self.auth_service.user_repository.update_user_tokens.return_value = True
         
         result = self.auth_service.login_user(user_data)
-        assert "access_token" in result
-        assert "refresh_token" in result
+        assert result.access_token
+        assert result.refresh_token
         assert result.token_type == "bearer"
 
+    def test_issue_tokens_expiry_matches_stored_expiry(self):
+        """Test the JWT exp claims match the expiry times stored for the tokens"""
+        mock_user = Mock(spec=User, id=1, email="test@example.com")
+        
+        result = self.auth_service.issue_tokens(mock_user)
+        
+        args = self.auth_service.user_repository.update_user_tokens.call_args.args
+        access_expires, refresh_expires = args[3], args[4]
+        assert self.auth_service.verify_token(result.access_token)["exp"] == int(access_expires.replace(tzinfo=timezone.utc).timestamp())
+        assert self.auth_service.verify_token(result.refresh_token)["exp"] == int(refresh_expires.replace(tzinfo=timezone.utc).timestamp())
+        assert args[1] == self.auth_service.hash_token(result.access_token)
+        assert args[2] == self.auth_service.hash_token(result.refresh_token)
+
     def test_login_user_invalid_credentials(self):
         """Test login with invalid credentials"""
         user_data = UserLogin(email="test@example.com", password="wrong_password")
@@ -152,13 +196,49 @@ class TestAuthService:
     def test_login_user_inactive_account(self):
         """Test login with inactive account"""
         user_data = UserLogin(email="test@example.com", password="password")
-        mock_user = Mock()
-        mock_user.is_active = False
+        mock_user = Mock(spec=User, is_active=False)
         
-        self.auth_service.authenticate_user = Mock(return_value={"id": 1, "email": "test@example.com", "username": "testuser"})
-        self.auth_service.user_repository.get_user_by_id.return_value = mock_user
+        self.auth_service.authenticate_user = Mock(return_value=mock_user)
         
         with pytest.raises(HTTPException) as exc_info:
             self.auth_service.login_user(user_data)
         assert exc_info.value.status_code == 401
-        assert "User account is disabled" in str(exc_info.value.detail) 
\ No newline at end of file
+        assert "User account is disabled" in str(exc_info.value.detail)
+
+    def test_get_current_user_returns_user(self):
+        """Test getting current user returns the row found by access token"""
+        token = self.auth_service.create_access_token({"sub": "test@example.com"})
+        mock_user = Mock(spec=User)
+        
+        self.auth_service.user_repository.get_user_by_access_token.return_value = mock_user
+        
+        result = self.auth_service.get_current_user(token)
+        assert result is mock_user
+        self.auth_service.user_repository.get_user_by_access_token.assert_called_once_with(
+            self.auth_service.hash_token(token)
+        )
+        self.auth_service.user_repository.get_user_by_id.assert_not_called()
+
+    def test_get_current_user_invalid_token(self):
+        """Test getting current user with invalid token"""
+        result = self.auth_service.get_current_user("invalid_token")
+        assert result is None
+        self.auth_service.user_repository.get_user_by_access_token.assert_not_called()
+
+    def test_logout_user_success(self):
+        """Test logout clears tokens by access token hash without loading the user"""
+        token = self.auth_service.create_access_token({"sub": "test@example.com"})
+        
+        self.auth_service.user_repository.clear_tokens_by_access_token.return_value = True
+        
+        assert self.auth_service.logout_user(token) is True
+        self.auth_service.user_repository.clear_tokens_by_access_token.assert_called_once_with(
+            self.auth_service.hash_token(token)
+        )
+        self.auth_service.user_repository.get_user_by_email.assert_not_called()
+
+    def test_logout_user_invalid_token(self):
+        """Test logout with invalid token"""
+        with pytest.raises(HTTPException) as exc_info:
+            self.auth_service.logout_user("invalid_token")
+        assert exc_info.value.status_code == 401
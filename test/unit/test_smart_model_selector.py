@@ -0,0 +1,127 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from datetime import datetime
+from app.services import smart_model_selector
+from app.services.smart_model_selector import SmartModelSelector, ScoredModel
+
+class TestSmartModelSelector:
+    def setup_method(self):
+        """Setup method for each test"""
+        self.today = datetime(2024, 8, 1)
+        smart_model_selector._catalog_cache.clear()
+        smart_model_selector._curated_cache.clear()
+        smart_model_selector._breaker.clear()
+
+    def test_extract_model_date_iso(self):
+        """Test date extraction from OpenAI-style IDs"""
+        assert SmartModelSelector.extract_model_date("gpt-4o-mini-2024-07-18") == datetime(2024, 7, 18)
+
+    def test_extract_model_date_compact(self):
+        """Test date extraction from Claude-style IDs"""
+        assert SmartModelSelector.extract_model_date("claude-3-5-sonnet-20240620") == datetime(2024, 6, 20)
+
+    def test_extract_model_date_version(self):
+        """Test version numbers are treated as pseudo-dates"""
+        assert SmartModelSelector.extract_model_date("gpt-4.1-mini") > datetime(2024, 1, 1)
+
+    def test_extract_model_date_none(self):
+        """Test IDs without a date or version"""
+        assert SmartModelSelector.extract_model_date("gpt-4") is None
+
+    def test_is_latest_version(self):
+        """Test latest detection by keyword, date and known indicators"""
+        assert SmartModelSelector.is_latest_version("gemini-1.0-pro-latest", self.today) is True
+        assert SmartModelSelector.is_latest_version("gpt-4o-2024-05-13", self.today) is True
+        assert SmartModelSelector.is_latest_version("gpt-4-0613", self.today) is False
+        assert SmartModelSelector.is_latest_version("claude-3-5-sonnet", self.today) is True
+
+    def test_score_openai_model(self):
+        """Test OpenAI scoring applies recency and version bonuses"""
+        assert SmartModelSelector.score_openai_model("gpt-4o-mini-2024-07-18", self.today) == (1, 70, 'latest', 'premium')
+        assert SmartModelSelector.score_openai_model("dall-e-3", self.today) == (99, 0, 'unknown', 'unknown')
+
+    def test_score_claude_model(self):
+        """Test Claude scoring for 3.5 models"""
+        assert SmartModelSelector.score_claude_model("claude-3-5-sonnet-20240620", self.today) == (1, 50, 'latest', 'premium')
+
+    def test_score_is_cached_per_day(self):
+        """Test scores are memoized per model and day"""
+        SmartModelSelector.score_claude_model.cache_clear()
+        SmartModelSelector.score_claude_model("claude-3-opus-20240229", self.today)
+        SmartModelSelector.score_claude_model("claude-3-opus-20240229", self.today)
+        info = SmartModelSelector.score_claude_model.cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+        later = SmartModelSelector.score_claude_model("claude-3-opus-20240229", datetime(2025, 8, 1))
+        assert later != SmartModelSelector.score_claude_model("claude-3-opus-20240229", self.today)
+
+    def test_format_names(self):
+        """Test model ID formatting"""
+        assert SmartModelSelector.format_openai_name("gpt-4o-mini-2024-07-18") == 'GPT-4o Mini'
+        assert SmartModelSelector.format_gemini_name("gemini-1.5-flash-latest") == 'Gemini 1.5 Flash'
+        assert SmartModelSelector.format_claude_name("claude-3-haiku-20240307") == 'Claude 3 Haiku'
+
+    def test_ensure_model_diversity(self):
+        """Test diversity picks one model per category before filling by score"""
+        models = [
+            ScoredModel('a', 'A', 'openai', 'latest', 'premium', -30, True),
+            ScoredModel('b', 'B', 'openai', 'latest', 'premium', -20, True),
+            ScoredModel('c', 'C', 'openai', 'fast', 'budget', -10, False),
+        ]
+        assert [m.id for m in SmartModelSelector.ensure_model_diversity(models, 2)] == ['a', 'c']
+        assert [m.id for m in SmartModelSelector.ensure_model_diversity(models, 3)] == ['a', 'c', 'b']
+        assert SmartModelSelector.ensure_model_diversity([], 2) == []
+
+    def test_select_models_builds_only_finalists(self):
+        """Test only the top models and each category's best are formatted"""
+        candidates = [
+            ('a', (1, 30, 'latest', 'premium')),
+            ('b', (1, 20, 'latest', 'premium')),
+            ('c', (1, 10, 'latest', 'premium')),
+            ('d', (4, 0, 'fast', 'budget')),
+        ]
+        formatter = Mock(side_effect=str.upper)
+        selected = SmartModelSelector._select_models(candidates, 'openai', formatter, 2, self.today)
+        assert [m.id for m in selected] == ['a', 'd']
+        assert sorted(call.args[0] for call in formatter.call_args_list) == ['a', 'b', 'd']
+
+    @pytest.mark.asyncio
+    async def test_get_curated_models_falls_back_per_provider(self):
+        """Test a failing provider falls back without affecting the others"""
+        settings = Mock(OPENAI_API_KEY="key", GEMINI_API_KEY="key", ANTHROPIC_API_KEY="")
+        gemini = SmartModelSelector._get_fallback_gemini_models()[:1]
+        with patch.object(SmartModelSelector, "_curate_openai", AsyncMock(side_effect=RuntimeError("down"))), \
+                patch.object(SmartModelSelector, "_curate_gemini", AsyncMock(return_value=gemini)):
+            curated = await SmartModelSelector.get_curated_models(settings, max_per_provider=1)
+        assert curated['openai'] == SmartModelSelector._get_fallback_openai_models()[:1]
+        assert curated['google'] == gemini
+        assert curated['anthropic'] == []
+
+    @pytest.mark.asyncio
+    async def test_fetch_catalog_is_cached(self):
+        """Test provider catalogs are fetched once within the TTL"""
+        response = Mock(content=b'{"data": [{"id": "gpt-4o"}]}')
+        client = Mock(get=AsyncMock(return_value=response))
+        for _ in range(2):
+            models = await SmartModelSelector._fetch_catalog(client, 'openai', "https://example.test", 'data')
+        assert models == [{'id': 'gpt-4o'}]
+        client.get.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_get_curated_models_is_cached(self):
+        """Test curated results are reused when every provider succeeded"""
+        settings = Mock(OPENAI_API_KEY="", GEMINI_API_KEY="", ANTHROPIC_API_KEY="key")
+        first = await SmartModelSelector.get_curated_models(settings)
+        with patch.object(SmartModelSelector, "score_claude_model") as score:
+            second = await SmartModelSelector.get_curated_models(settings)
+        assert second is first
+        score.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fetch_catalog_skips_failing_provider(self):
+        """Test repeated failures open the breaker and skip the request"""
+        client = Mock(get=AsyncMock(side_effect=RuntimeError("down")))
+        for _ in range(4):
+            with pytest.raises(RuntimeError):
+                await SmartModelSelector._fetch_catalog(client, 'openai', "https://example.test", 'data')
+        assert client.get.await_count == 3
@@ -1,216 +1,265 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import patch
+from types import SimpleNamespace
 from datetime import datetime
+import bcrypt
+from argon2.exceptions import VerifyMismatchError
+from app.models.user import User
 from app.repository.user_repository import UserRepository
 from app.schemas.user import UserCreate
 
+class FakeHasher:
+    """Stand-in for the argon2 hasher so tests skip the KDF"""
+    def hash(self, password):
+        return "h:" + password
+
+    def verify(self, hashed, password):
+        if hashed != "h:" + password:
+            raise VerifyMismatchError()
+        return True
+
+    def check_needs_rehash(self, hashed):
+        return False
+
+class FakeResult:
+    """Result of FakeSession.execute"""
+    def __init__(self, value, rowcount):
+        self._value = value
+        self.rowcount = rowcount
+
+    def scalar_one_or_none(self):
+        return self._value
+
+class FakeSession:
+    """Records what the repository does with its Session"""
+    def __init__(self):
+        self.result = None
+        self.rowcount = 0
+        self.executed = []
+        self.gets = []
+        self.calls = []
+
+    def execute(self, statement, params=None):
+        self.executed.append(statement)
+        return FakeResult(self.result, self.rowcount)
+
+    def get(self, model, ident):
+        self.gets.append((model, ident))
+        return self.result
+
+    def add(self, obj):
+        self.calls.append(("add", obj))
+
+    def commit(self):
+        self.calls.append(("commit",))
+
+    def refresh(self, obj):
+        self.calls.append(("refresh", obj))
+
+@pytest.fixture(scope="session")
+def shared_hasher():
+    """One fake hasher shared by every test"""
+    return FakeHasher()
+
+@pytest.fixture
+def fake_db():
+    """Fresh fake session per test"""
+    return FakeSession()
+
+@pytest.fixture
+def user_repository(fake_db, shared_hasher):
+    """Repository under test, bound to the per-test fake session"""
+    return UserRepository(fake_db, hasher=shared_hasher)
+
+@pytest.fixture
+def mock_user_class():
+    """Patch the User model the repository instantiates"""
+    with patch('app.repository.user_repository.User') as mock_class:
+        yield mock_class
+
+@pytest.fixture(scope="module")
+def hashed_test_password(shared_hasher):
+    """Hash of "test_password", computed once per module"""
+    return shared_hasher.hash("test_password")
+
+@pytest.fixture(scope="module")
+def legacy_bcrypt_hash():
+    """Legacy bcrypt hash of "test_password", computed once per module"""
+    return bcrypt.hashpw(b"test_password", bcrypt.gensalt(rounds=4)).decode()
+
+# Fixed timestamp so token tests are deterministic
+_NOW = datetime(2024, 1, 1, 0, 0, 0)
+
+# Validated once and only read by tests
+_USER_CREATE = UserCreate(email="test@example.com", username="testuser", password="password")
+
 class TestUserRepository:
-    def setup_method(self):
-        """Setup method for each test"""
-        self.mock_db = Mock()
-        self.user_repository = UserRepository(self.mock_db)
+    def test_password_round_trip_argon2(self, fake_db):
+        """Test hashing and verification with the default argon2 hasher"""
+        user_repository = UserRepository(fake_db)
+        hashed = user_repository.get_password_hash("test_password")
+        assert hashed.startswith("$argon2id$")
+        assert user_repository.verify_password("test_password", hashed) is True
+        assert user_repository.verify_password("wrong_password", hashed) is False
 
-    def test_get_password_hash(self):
+    def test_default_hasher_is_shared(self, fake_db):
+        """Test repositories reuse one module-level hasher instead of building their own"""
+        assert UserRepository(fake_db).hasher is UserRepository(FakeSession()).hasher
+
+    def test_get_password_hash(self, user_repository):
         """Test password hashing"""
         password = "test_password"
-        hashed = self.user_repository.get_password_hash(password)
+        hashed = user_repository.get_password_hash(password)
         assert isinstance(hashed, str)
         assert hashed != password
         assert len(hashed) > 0
 
-    def test_verify_password_correct(self):
+    def test_verify_password_correct(self, user_repository, hashed_test_password):
         """Test password verification with correct password"""
-        password = "test_password"
-        hashed = self.user_repository.get_password_hash(password)
-        result = self.user_repository.verify_password(password, hashed)
+        result = user_repository.verify_password("test_password", hashed_test_password)
         assert result is True
 
-    def test_verify_password_incorrect(self):
+    def test_verify_password_incorrect(self, user_repository, hashed_test_password):
         """Test password verification with incorrect password"""
-        password = "test_password"
-        hashed = self.user_repository.get_password_hash(password)
-        result = self.user_repository.verify_password("wrong_password", hashed)
+        result = user_repository.verify_password("wrong_password", hashed_test_password)
         assert result is False
 
-    def test_get_user_by_email_found(self):
-        """Test getting user by email when user exists"""
-        mock_user = Mock()
-        mock_user.email = "test@example.com"
-        
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        result = self.user_repository.get_user_by_email("test@example.com")
-        assert result == mock_user
+    def test_verify_password_legacy_bcrypt(self, user_repository, legacy_bcrypt_hash):
+        """Test password verification against a legacy bcrypt hash"""
+        assert user_repository.verify_password("test_password", legacy_bcrypt_hash) is True
+        assert user_repository.verify_password("wrong_password", legacy_bcrypt_hash) is False
 
-    def test_get_user_by_email_not_found(self):
-        """Test getting user by email when user doesn't exist"""
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        result = self.user_repository.get_user_by_email("nonexistent@example.com")
-        assert result is None
+    @pytest.mark.parametrize("hashed", ["$2bogus", "not-a-hash"])
+    def test_verify_password_malformed_hash(self, hashed):
+        """Test malformed stored hashes fail verification instead of raising"""
+        assert UserRepository(FakeSession()).verify_password("test_password", hashed) is False
 
-    def test_get_user_by_username_found(self):
-        """Test getting user by username when user exists"""
-        mock_user = Mock()
-        mock_user.username = "testuser"
-        
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        result = self.user_repository.get_user_by_username("testuser")
-        assert result == mock_user
+    def test_password_needs_rehash(self, user_repository, hashed_test_password, legacy_bcrypt_hash):
+        """Test legacy bcrypt hashes are flagged for rehash and current ones are not"""
+        assert user_repository.password_needs_rehash(legacy_bcrypt_hash) is True
+        assert user_repository.password_needs_rehash(hashed_test_password) is False
 
-    def test_get_user_by_username_not_found(self):
-        """Test getting user by username when user doesn't exist"""
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        result = self.user_repository.get_user_by_username("nonexistentuser")
-        assert result is None
+    @pytest.mark.parametrize("found", [True, False])
+    @pytest.mark.parametrize("method,args", [
+        ("get_user_by_email", ("test@example.com",)),
+        ("get_user_by_username", ("testuser",)),
+        ("get_user_by_email_or_username", ("test@example.com", "testuser")),
+        ("get_user_by_refresh_token", ("refresh_hash",)),
+        ("get_user_by_access_token", ("access_hash",)),
+    ])
+    def test_lookup(self, user_repository, fake_db, method, args, found):
+        """Test each select-based lookup returns the matching user or None"""
+        expected = SimpleNamespace() if found else None
+        fake_db.result = expected
+        
+        result = getattr(user_repository, method)(*args)
+        assert result is expected
+        assert len(fake_db.executed) == 1
+
+    @pytest.mark.parametrize("found", [True, False])
+    def test_get_user_by_id(self, user_repository, fake_db, found):
+        """Test getting user by ID when the user exists and when it doesn't"""
+        mock_user = SimpleNamespace(id=1)
+        expected = mock_user if found else None
+        fake_db.result = expected
+        
+        result = user_repository.get_user_by_id(1)
+        assert result is expected
+        # Goes through the session identity map rather than a SELECT
+        assert fake_db.gets == [(User, 1)]
+        assert fake_db.executed == []
 
-    def test_get_user_by_id_found(self):
-        """Test getting user by ID when user exists"""
-        mock_user = Mock()
-        mock_user.id = 1
+    def test_create_user_success(self, user_repository, fake_db, mock_user_class):
+        """Test successful user creation"""
+        user_data = _USER_CREATE
+        mock_user = SimpleNamespace(id=1, email="test@example.com", username="testuser")
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
+        mock_user_class.return_value = mock_user
+        result = user_repository.create_user(user_data)
         
-        result = self.user_repository.get_user_by_id(1)
         assert result == mock_user
+        assert fake_db.calls == [("add", mock_user), ("commit",), ("refresh", mock_user)]
 
-    def test_get_user_by_id_not_found(self):
-        """Test getting user by ID when user doesn't exist"""
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        result = self.user_repository.get_user_by_id(999)
-        assert result is None
-
-    def test_create_user_success(self):
-        """Test successful user creation"""
-        user_data = UserCreate(email="test@example.com", username="testuser", password="password")
-        mock_user = Mock()
-        mock_user.id = 1
-        mock_user.email = "test@example.com"
-        mock_user.username = "testuser"
-        
-        self.mock_db.add.return_value = None
-        self.mock_db.commit.return_value = None
-        self.mock_db.refresh.return_value = None
-        
-        with patch('app.repository.user_repository.User') as mock_user_class:
-            mock_user_class.return_value = mock_user
-            result = self.user_repository.create_user(user_data)
-            
-            assert result == mock_user
-            self.mock_db.add.assert_called_once()
-            self.mock_db.commit.assert_called_once()
-            self.mock_db.refresh.assert_called_once_with(mock_user)
-
-    def test_update_user_tokens_success(self):
+    def test_update_user_tokens_success(self, user_repository, fake_db):
         """Test successful token update"""
         user_id = 1
         access_token_hash = "access_hash"
         refresh_token_hash = "refresh_hash"
-        access_expires = datetime.utcnow()
-        refresh_expires = datetime.utcnow()
+        access_expires = _NOW
+        refresh_expires = _NOW
         
-        mock_user = Mock()
-        mock_user.id = user_id
+        fake_db.rowcount = 1
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        self.mock_db.commit.return_value = None
-        
-        result = self.user_repository.update_user_tokens(
+        result = user_repository.update_user_tokens(
             user_id, access_token_hash, refresh_token_hash, access_expires, refresh_expires
         )
         
         assert result is True
-        assert mock_user.access_token_hash == access_token_hash
-        assert mock_user.refresh_token_hash == refresh_token_hash
-        assert mock_user.access_token_expires_at == access_expires
-        assert mock_user.refresh_token_expires_at == refresh_expires
-        self.mock_db.commit.assert_called_once()
+        params = fake_db.executed[-1].compile().params
+        assert params["access_token_hash"] == access_token_hash
+        assert params["refresh_token_hash"] == refresh_token_hash
+        assert params["access_token_expires_at"] == access_expires
+        assert params["refresh_token_expires_at"] == refresh_expires
+        assert fake_db.gets == []
+        assert fake_db.calls == [("commit",)]
 
-    def test_update_user_tokens_user_not_found(self):
+    def test_update_user_tokens_user_not_found(self, user_repository, fake_db):
         """Test token update when user doesn't exist"""
         user_id = 999
         access_token_hash = "access_hash"
         refresh_token_hash = "refresh_hash"
-        access_expires = datetime.utcnow()
-        refresh_expires = datetime.utcnow()
+        access_expires = _NOW
+        refresh_expires = _NOW
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
+        fake_db.rowcount = 0
         
-        result = self.user_repository.update_user_tokens(
+        result = user_repository.update_user_tokens(
             user_id, access_token_hash, refresh_token_hash, access_expires, refresh_expires
         )
         
         assert result is False
 
-    def test_clear_user_tokens_success(self):
+    def test_clear_user_tokens_success(self, user_repository, fake_db):
         """Test successful token clearing"""
         user_id = 1
-        mock_user = Mock()
-        mock_user.id = user_id
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        self.mock_db.commit.return_value = None
+        fake_db.rowcount = 1
         
-        result = self.user_repository.clear_user_tokens(user_id)
+        result = user_repository.clear_user_tokens(user_id)
         
         assert result is True
-        assert mock_user.access_token_hash is None
-        assert mock_user.refresh_token_hash is None
-        assert mock_user.access_token_expires_at is None
-        assert mock_user.refresh_token_expires_at is None
-        self.mock_db.commit.assert_called_once()
+        params = fake_db.executed[-1].compile().params
+        assert params["access_token_hash"] is None
+        assert params["refresh_token_hash"] is None
+        assert params["access_token_expires_at"] is None
+        assert params["refresh_token_expires_at"] is None
+        assert fake_db.gets == []
+        assert fake_db.calls == [("commit",)]
 
-    def test_clear_user_tokens_user_not_found(self):
+    def test_clear_user_tokens_user_not_found(self, user_repository, fake_db):
         """Test token clearing when user doesn't exist"""
         user_id = 999
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
+        fake_db.rowcount = 0
         
-        result = self.user_repository.clear_user_tokens(user_id)
+        result = user_repository.clear_user_tokens(user_id)
         
         assert result is False
 
-    def test_get_user_by_refresh_token_found(self):
-        """Test getting user by refresh token when user exists"""
-        refresh_token_hash = "refresh_hash"
-        mock_user = Mock()
-        mock_user.refresh_token_hash = refresh_token_hash
-        mock_user.refresh_token_expires_at = datetime.utcnow()
+    def test_clear_tokens_by_access_token_success(self, user_repository, fake_db):
+        """Test clearing tokens by access token hash in a single UPDATE"""
+        fake_db.rowcount = 1
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
+        result = user_repository.clear_tokens_by_access_token("access_hash")
         
-        result = self.user_repository.get_user_by_refresh_token(refresh_token_hash)
-        assert result == mock_user
-
-    def test_get_user_by_refresh_token_not_found(self):
-        """Test getting user by refresh token when user doesn't exist"""
-        refresh_token_hash = "refresh_hash"
-        
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        result = self.user_repository.get_user_by_refresh_token(refresh_token_hash)
-        assert result is None
-
-    def test_get_user_by_access_token_found(self):
-        """Test getting user by access token when user exists"""
-        access_token_hash = "access_hash"
-        mock_user = Mock()
-        mock_user.access_token_hash = access_token_hash
-        mock_user.access_token_expires_at = datetime.utcnow()
-        
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        result = self.user_repository.get_user_by_access_token(access_token_hash)
-        assert result == mock_user
+        assert result is True
+        assert len(fake_db.executed) == 1
+        assert fake_db.calls == [("commit",)]
 
-    def test_get_user_by_access_token_not_found(self):
-        """Test getting user by access token when user doesn't exist"""
-        access_token_hash = "access_hash"
+    def test_clear_tokens_by_access_token_not_found(self, user_repository, fake_db):
+        """Test clearing tokens when no user holds the access token"""
+        fake_db.rowcount = 0
         
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
+        result = user_repository.clear_tokens_by_access_token("access_hash")
         
-        result = self.user_repository.get_user_by_access_token(access_token_hash)
-        assert result is None 
\ No newline at end of file
+        assert result is False